@@ -1,37 +1,59 @@
 #!/usr/bin/env python3
 """
 GitBridge — Stable Flask backend with enhanced error handling and safety
-• Implements Git locking to prevent race conditions (cross-platform via filelock)
+• Implements Git locking to prevent race conditions (in-process lock, filelock across processes)
 • Enhanced error handling and logging
 • Path validation for security
 • Profile switching support
 • Robust commit/push operations
-• Secure clone using GIT_ASKPASS helper
+• Secure clone with the token sent as an HTTP auth header
 """
+import atexit
 import os
-import json
+import queue
+import random
 import shutil
 import subprocess
+import tempfile
+import threading
 import time
+import uuid
+import itertools
 import logging
+import zlib
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from contextlib import contextmanager
-from functools import wraps
+from contextlib import contextmanager, suppress
+from dataclasses import dataclass
+from functools import lru_cache, wraps
 
+import orjson
+from cachetools import TTLCache
 from filelock import FileLock, Timeout
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge
 
 # ---------------------------------------------------------------------
 # 0. LOGGING SETUP
 # ---------------------------------------------------------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('gitbridge.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configure only once, so a re-import doesn't stack duplicate handlers.
+# Request threads only enqueue records; a listener thread does the file and
+# console I/O. The QueueHandler formats each record, so the sinks print it as-is.
+if not logging.getLogger().handlers:
+    _log_queue = queue.Queue(-1)
+    _log_listener = QueueListener(
+        _log_queue,
+        RotatingFileHandler('gitbridge.log', maxBytes=10_000_000, backupCount=3),
+        logging.StreamHandler(),
+        respect_handler_level=True
+    )
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[QueueHandler(_log_queue)]
+    )
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------
@@ -39,76 +61,158 @@ logger = logging.getLogger(__name__)
 # ---------------------------------------------------------------------
 PROFILE_PATH = Path("profiles/active.json")
 
-def load_profile():
+def load_profile(path: Path = PROFILE_PATH):
     """Load and validate profile configuration"""
-    if not PROFILE_PATH.exists():
-        raise FileNotFoundError(f"Missing profile: {PROFILE_PATH}")
+    if not path.exists():
+        raise FileNotFoundError(f"Missing profile: {path}")
     try:
-        profile = json.loads(PROFILE_PATH.read_text())
+        profile = orjson.loads(path.read_bytes())
         required_keys = ["repo", "token", "local_folder"]
         missing = [k for k in required_keys if k not in profile]
         if missing:
             raise ValueError(f"Profile missing required keys: {missing}")
         return profile
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         raise ValueError(f"Invalid JSON in profile: {e}")
 
+# Profile index, rebuilt only when the profiles directory mtime changes
+_profiles_cache = {"mtime": -1, "names": [], "by_name": {}}
+
+def _scan_profiles() -> dict:
+    """Return the cached profile index (sorted names and name -> file map)"""
+    global _profiles_cache
+    try:
+        mtime = PROFILE_PATH.parent.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    cache = _profiles_cache
+    if cache["mtime"] == mtime:
+        return cache
+    by_name = {}
+    if mtime is not None:
+        for f in sorted(PROFILE_PATH.parent.glob("*.json")):
+            try:
+                j = orjson.loads(f.read_bytes())
+            except (OSError, orjson.JSONDecodeError):
+                continue
+            name = j.get('name') if isinstance(j, dict) else None
+            # prefer the named profile file over active.json, which is a copy of one
+            if name and (name not in by_name or by_name[name] == PROFILE_PATH):
+                by_name[name] = f
+    cache = {"mtime": mtime, "names": sorted(by_name), "by_name": by_name}
+    _profiles_cache = cache
+    return cache
+
+@dataclass(frozen=True, slots=True)
+class Cfg:
+    """Immutable snapshot of the active profile
+
+    Hot paths read the module-level CFG once (`cfg = CFG`); activating a
+    profile builds a new Cfg and rebinds CFG, so readers never need a lock.
+    """
+    name: str
+    repo: str
+    token: str
+    local_folder: Path
+    safe_mode: bool
+    local_abs: str  # absolute repo root for lexical path checks
+
+
+def build_cfg(profile: dict) -> Cfg:
+    local_folder = Path(profile.get("local_folder", "local_repo"))
+    return Cfg(
+        name=profile.get("name", "unknown"),
+        repo=profile.get("repo", ""),
+        token=profile.get("token", os.getenv("GITHUB_TOKEN", "")),
+        local_folder=local_folder,
+        # Safe mode can be overridden via env var or profile
+        safe_mode=os.getenv("GITBRIDGE_SAFE_MODE", str(profile.get("safe_mode", True))).lower() == "true",
+        local_abs=os.path.abspath(str(local_folder)),
+    )
+
 # Attempt graceful profile load
 try:
-    profile = load_profile()
+    CFG = build_cfg(load_profile())
 except Exception as e:
     logger.critical(f"Could not load active profile: {e}")
-    profile = {}
+    CFG = build_cfg({})
 
-REPO = profile.get("repo", "")
-TOKEN = profile.get("token", os.getenv("GITHUB_TOKEN", ""))
-LOCAL_FOLDER = Path(profile.get("local_folder", "local_repo"))
-# Safe mode can be overridden via env var or profile
-SAFE_MODE = os.getenv("GITBRIDGE_SAFE_MODE", str(profile.get("safe_mode", True))).lower() == "true"
+# Retry policy for push and clone: full-jitter exponential backoff
+GIT_RETRIES = max(1, int(os.getenv("GITBRIDGE_RETRIES", "3")))
+BACKOFF_CAP = float(os.getenv("GITBRIDGE_BACKOFF_CAP", "8.0"))
 
 # ---------------------------------------------------------------------
 # 2. SECURITY & VALIDATION
 # ---------------------------------------------------------------------
-def validate_path(path_str: str) -> Path:
+# Single characters rejected in paths; translate() deletes them in one C-level pass
+_FORBIDDEN_CHARS = dict.fromkeys(map(ord, "~$`|;&\x00"))
+
+# Longest accepted client path; checked before the cache so huge strings are never stored
+MAX_PATH_LEN = 4096  # PATH_MAX on Linux
+
+def validate_path(path_str: str, cfg: Cfg = None) -> Path:
     """Validate and sanitize file paths to prevent directory traversal"""
+    if not isinstance(path_str, str):
+        raise ValueError("Path must be a string")
+    if len(path_str) > MAX_PATH_LEN:
+        raise ValueError(f"Path longer than {MAX_PATH_LEN} characters")
+    return _validate_path_cached(path_str, (cfg or CFG).local_abs)
+
+# Pure given the repo root, which is part of the key; activate_profile clears
+# it so entries for the previous root don't linger
+@lru_cache(maxsize=2048)
+def _validate_path_cached(path_str: str, local_abs: str) -> Path:
     if not path_str:
         raise ValueError("Path cannot be empty")
-    for pattern in ('..', '~', '$', '`', '|', ';', '&', '\x00'):
-        if pattern in path_str:
-            raise ValueError(f"Path contains dangerous pattern: {pattern}")
+    if path_str.translate(_FORBIDDEN_CHARS) != path_str:
+        pattern = next(c for c in path_str if ord(c) in _FORBIDDEN_CHARS)
+        raise ValueError(f"Path contains dangerous pattern: {pattern}")
+    if '..' in path_str:
+        raise ValueError("Path contains dangerous pattern: ..")
     if path_str.startswith('/') or (len(path_str) > 1 and path_str[1] == ':'):
         raise ValueError("Absolute paths not allowed")
-    full_path = (LOCAL_FOLDER / path_str).resolve()
-    try:
-        full_path.relative_to(LOCAL_FOLDER.resolve())
-    except ValueError:
+    # dangerous patterns are already rejected, so a lexical check is enough
+    cand = os.path.normpath(os.path.join(local_abs, path_str))
+    if cand != local_abs and not cand.startswith(local_abs + os.sep):
         raise ValueError("Path outside repository boundaries")
-    return full_path
+    return Path(cand)
 
 # ---------------------------------------------------------------------
 # 3. GIT OPERATIONS WITH LOCKING
 # ---------------------------------------------------------------------
-LOCK_PATH = LOCAL_FOLDER / ".git_lock"
+# The file lock is only needed when several backend processes share one clone
+MULTIPROC = os.getenv("GITBRIDGE_MULTIPROC") == "1"
+_proc_lock = threading.Lock()
 
 @contextmanager
-def git_lock(timeout: int = 30):
-    """Ensure only one Git operation at a time (cross-platform)"""
-    lock = FileLock(str(LOCK_PATH))
+def git_lock(timeout: int = 30, cfg: Cfg = None):
+    """Ensure only one Git operation at a time (in-process, plus filelock if multi-process)"""
+    if not _proc_lock.acquire(blocking=False):
+        logger.info("Git lock contended, waiting")
+        if not _proc_lock.acquire(timeout=timeout):
+            raise TimeoutError("Could not acquire Git lock within timeout period")
     try:
-        lock.acquire(timeout=timeout)
-        logger.info("Acquired Git lock")
-        yield
-    except Timeout:
-        raise Exception("Could not acquire Git lock within timeout period")
+        if not MULTIPROC:
+            yield
+            return
+        # kept inside .git so `git add -A` never commits the lock file
+        lock = FileLock(str((cfg or CFG).local_folder / ".git" / "gitbridge.lock"))
+        try:
+            lock.acquire(timeout=timeout)
+        except Timeout:
+            raise TimeoutError("Could not acquire Git lock within timeout period")
+        try:
+            yield
+        finally:
+            with suppress(Exception):
+                lock.release()
     finally:
-        if lock.is_locked:
-            lock.release()
-            logger.info("Released Git lock")
+        _proc_lock.release()
 
 
 def safe_git_operation(cmd, cwd=None, timeout=30):
     """Execute Git command with proper error handling"""
-    cwd = cwd or LOCAL_FOLDER
+    cwd = cwd or CFG.local_folder
     try:
         result = subprocess.run(
             cmd,
@@ -118,7 +222,7 @@ def safe_git_operation(cmd, cwd=None, timeout=30):
             check=True,
             timeout=timeout
         )
-        logger.info(f"Git command successful: {' '.join(cmd)}")
+        logger.debug(f"Git command successful: {' '.join(cmd)}")
         return result
     except subprocess.CalledProcessError as e:
         logger.error(f"Git command failed: {' '.join(cmd)}, error: {e.stderr}")
@@ -128,62 +232,285 @@ def safe_git_operation(cmd, cwd=None, timeout=30):
         raise
 
 
-def commit_push_safe(msg: str) -> bool:
-    """Safe commit and push with retries"""
-    retries = 3
+# /tree responses are cached under (HEAD sha, repo mtime, generation); local
+# writes and commits bump the generation so nested changes are never missed
+_tree_cache: tuple[tuple, bytes] | None = None
+_tree_generations = itertools.count()
+_tree_generation = next(_tree_generations)
+
+
+def _invalidate_tree_cache() -> None:
+    global _tree_cache, _tree_generation
+    _tree_generation = next(_tree_generations)
+    _tree_cache = None
+
+
+def _head_sha(cfg: Cfg) -> str:
+    """Resolve HEAD to a commit sha by reading .git directly (no git subprocess)"""
+    git_dir = cfg.local_folder / ".git"
+    try:
+        head = (git_dir / "HEAD").read_text().strip()
+    except OSError:
+        return ""
+    if head.startswith("ref: "):
+        try:
+            return (git_dir / head[5:]).read_text().strip()
+        except OSError:
+            # ref only lives in packed-refs; the ref name plus mtime still keys the cache
+            return head
+    return head
+
+
+# add/commit/push run as one shell pipeline so each commit pays for a single
+# process launch; the commit message is passed as $1, never interpolated.
+# The push is optimistic: we only pull --rebase when the remote rejects it.
+# Hooks (pre-commit, commit-msg, pre-push, ...) are skipped on the bot path;
+# set GITBRIDGE_DISABLE_HOOKS=0 to run them, e.g. while testing locally.
+DISABLE_HOOKS = os.getenv("GITBRIDGE_DISABLE_HOOKS", "1") == "1"
+_HOOK_ARGS = ["-c", "core.hooksPath=/dev/null"] if DISABLE_HOOKS else []
+_NO_VERIFY = ["--no-verify"] if DISABLE_HOOKS else []
+PUSH_CMD = ["git", *_HOOK_ARGS, "push", *_NO_VERIFY, "origin", "HEAD:main"]
+COMMIT_PUSH_SCRIPT = (
+    'git add -A'
+    f' && {" ".join(["git", *_HOOK_ARGS, "commit", *_NO_VERIFY])} -m "$1"'
+    f' && {" ".join(PUSH_CMD)}'
+)
+# push prints " ! [rejected]  HEAD -> main (fetch first|non-fast-forward)" per
+# rejected ref; "! [remote rejected]" (e.g. a declined hook) isn't fixed by a rebase
+PUSH_REJECTED_PREFIX = "! [rejected]"
+
+
+def _push_rejected(output: str) -> bool:
+    """True if the push in output was rejected as out of date with the remote.
+
+    Only the ref lines after push's "To <remote>" line are inspected, so file
+    names and commit messages echoed earlier by add/commit can't match."""
+    lines = output.splitlines()
+    starts = [i for i, line in enumerate(lines) if line.startswith("To ")]
+    if not starts:
+        return False
+    return any(line.lstrip().startswith(PUSH_REJECTED_PREFIX) for line in lines[starts[-1] + 1:])
+
+
+def _rebase_and_push(cwd: Path) -> None:
+    """Rebase the local commit onto origin/main and push again"""
+    try:
+        safe_git_operation(["git", *_HOOK_ARGS, "pull", "--rebase", "origin", "main"], cwd=cwd)
+    except subprocess.CalledProcessError:
+        with suppress(subprocess.CalledProcessError):
+            safe_git_operation(["git", "rebase", "--abort"], cwd=cwd)
+        raise
+    safe_git_operation(PUSH_CMD, cwd=cwd)
+
+
+def backoff_sleep(attempt: int, base: float = 1.0) -> None:
+    """Sleep a random time in [0, min(cap, base * 2**attempt)] so concurrent writers spread out"""
+    time.sleep(random.uniform(0, min(BACKOFF_CAP, base * 2 ** attempt)))
+
+
+def _unpushed_commits(cfg: Cfg, status_entries) -> int:
+    """Commits on HEAD not yet on the remote, read from the status --branch headers"""
+    for e in status_entries:
+        if e.startswith("# branch.ab "):
+            return int(e.split()[2])  # "+<ahead>"
+    # no upstream configured: compare against the remote-tracking branch directly
+    try:
+        out = safe_git_operation(
+            ["git", "-C", cfg.local_abs, "rev-list", "--count", "origin/main..HEAD"]
+        ).stdout
+    except subprocess.CalledProcessError:
+        return 0
+    return int(out.strip() or 0)
+
+
+def commit_push_safe(msg: str, cfg: Cfg = None) -> bool:
+    """Safe commit and push with retries, in cfg's repo (the active one by default).
+    Returns False if there was nothing to commit or push."""
+    cfg = cfg or CFG
+    retries = GIT_RETRIES
     for i in range(retries):
         try:
-            with git_lock():
-                status = safe_git_operation(["git", "status", "--porcelain"]).stdout
-                if not status.strip():
+            with git_lock(cfg=cfg):
+                status = safe_git_operation(
+                    ["git", "-C", cfg.local_abs, "status", "--porcelain=v2", "--branch", "-z"]
+                ).stdout
+                entries = [e for e in status.split("\0") if e]
+                if any(not e.startswith("#") for e in entries):
+                    cmd = ["sh", "-c", COMMIT_PUSH_SCRIPT, "--", msg]
+                elif _unpushed_commits(cfg, entries):
+                    # an earlier attempt committed but its push failed (network, auth)
+                    logger.info("Work tree clean but ahead of origin, pushing")
+                    cmd = PUSH_CMD
+                else:
                     logger.info("No changes to commit")
-                    return True
-                safe_git_operation(["git", "add", "."])
-                safe_git_operation(["git", "commit", "-m", msg])
-                try:
-                    safe_git_operation(["git", "pull", "origin", "main", "--rebase"])
-                except subprocess.CalledProcessError:
-                    logger.warning("Pull failed, continuing with push")
-                safe_git_operation(["git", "push", "origin", "HEAD:main"])
+                    return False
+                result = subprocess.run(
+                    cmd,
+                    cwd=cfg.local_folder,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    timeout=90
+                )
+                logger.info(f"Commit/push output: {result.stdout.strip()}")
+                if result.returncode != 0:
+                    if not _push_rejected(result.stdout):
+                        logger.error(f"Commit/push pipeline failed with exit code {result.returncode}")
+                        raise subprocess.CalledProcessError(
+                            result.returncode, cmd, output=result.stdout, stderr=result.stdout
+                        )
+                    logger.warning("Push rejected, rebasing onto origin/main")
+                    _rebase_and_push(cfg.local_folder)
+                _invalidate_tree_cache()
                 logger.info(f"Committed and pushed: {msg}")
                 return True
         except Exception as e:
             logger.error(f"Attempt {i+1}/{retries} failed: {e}")
             if i == retries - 1:
                 raise
-            time.sleep(2 ** i)
+            backoff_sleep(i)
     return False
 
+
+# Background commit worker: handlers only queue a message, and changes that
+# arrive within COMMIT_COALESCE_WINDOW seconds are pushed as one commit
+COMMIT_COALESCE_WINDOW = 0.25
+# Longest /profiles/activate waits for queued commits, each time it drains the queue
+COMMIT_DRAIN_TIMEOUT = 30
+MAX_TRACKED_JOBS = 1000
+commit_queue = queue.Queue()
+commit_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def _set_job_status(job_ids, status: str, error: str = None) -> None:
+    with _jobs_lock:
+        for job_id in job_ids:
+            job = commit_jobs.get(job_id)
+            if job is None:
+                continue
+            job["status"] = status
+            if error:
+                job["error"] = error
+
+
+def enqueue_commit(msg: str, cfg: Cfg) -> str:
+    """
+    Queue a commit for the background worker and return its job id. cfg is
+    the profile the change was written under, so it is committed to that
+    repo even if another profile is activated meanwhile.
+    """
+    job_id = uuid.uuid4().hex
+    with _jobs_lock:
+        commit_jobs[job_id] = {"status": "queued", "message": msg}
+        # dicts keep insertion order, so the oldest jobs are dropped first
+        while len(commit_jobs) > MAX_TRACKED_JOBS:
+            commit_jobs.pop(next(iter(commit_jobs)))
+    commit_queue.put((job_id, msg, cfg))
+    return job_id
+
+
+def wait_for_commits(timeout: float) -> bool:
+    """Wait until every queued commit has been processed; False on timeout"""
+    deadline = time.monotonic() + timeout
+    with commit_queue.all_tasks_done:
+        while commit_queue.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            commit_queue.all_tasks_done.wait(remaining)
+    return True
+
+
+def commit_worker():
+    """Drain the commit queue, coalescing pending changes into one commit+push"""
+    while True:
+        try:
+            batch = [commit_queue.get(timeout=0.5)]
+        except queue.Empty:
+            continue
+        deadline = time.monotonic() + COMMIT_COALESCE_WINDOW
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(commit_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # one commit per repo; a batch only spans repos around a profile switch
+        by_cfg = {}
+        for job_id, msg, cfg in batch:
+            by_cfg.setdefault(cfg, []).append((job_id, msg))
+        try:
+            for cfg, jobs in by_cfg.items():
+                job_ids = [job_id for job_id, _ in jobs]
+                _set_job_status(job_ids, "running")
+                try:
+                    # changes in a batch can cancel out (upload then delete): nothing to push
+                    pushed = commit_push_safe("; ".join(msg for _, msg in jobs), cfg)
+                    _set_job_status(job_ids, "done" if pushed else "no_changes")
+                except Exception as e:
+                    logger.error(f"Background commit failed: {e}")
+                    _set_job_status(job_ids, "failed", error=str(e))
+        finally:
+            for _ in batch:
+                commit_queue.task_done()
+
 # ---------------------------------------------------------------------
 # 4. GIT SETUP (Secure Clone)
 # ---------------------------------------------------------------------
-def ensure_repository():
-    """Ensure repository exists, clone if missing, and update main branch"""
+def ensure_repository(cfg: Cfg = None, retries: int = None) -> bool:
+    """Ensure repository exists, clone if missing, and update main branch.
+    Returns False if the clone or update failed."""
+    cfg = cfg or CFG
+    retries = retries or GIT_RETRIES
     try:
-        if not LOCAL_FOLDER.exists():
+        if not cfg.local_folder.exists():
             logger.info("Cloning repository...")
-            helper = LOCAL_FOLDER.parent / ".git_askpass.sh"
-            helper.write_text(f"#!/bin/sh\necho {TOKEN}")
-            helper.chmod(0o700)
+            # token goes in as an auth header set through the environment, so it is
+            # never on disk, in the process list, or in a logged command line
             env = os.environ.copy()
-            env.update({"GIT_ASKPASS": str(helper), "GITHUB_TOKEN": TOKEN})
-            subprocess.run(
-                ["git", "clone", f"https://github.com/{REPO}.git", str(LOCAL_FOLDER)],
-                check=True,
-                timeout=60,
-                env=env
-            )
+            env["GIT_TERMINAL_PROMPT"] = "0"
+            n = int(env.get("GIT_CONFIG_COUNT", 0))
+            env["GIT_CONFIG_COUNT"] = str(n + 1)
+            env[f"GIT_CONFIG_KEY_{n}"] = "http.extraheader"
+            env[f"GIT_CONFIG_VALUE_{n}"] = f"AUTHORIZATION: bearer {cfg.token}"
+            for i in range(retries):
+                try:
+                    subprocess.run(
+                        ["git", "clone", f"https://github.com/{cfg.repo}.git", str(cfg.local_folder)],
+                        check=True,
+                        timeout=60,
+                        env=env
+                    )
+                    break
+                except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+                    logger.error(f"Clone attempt {i+1}/{retries} failed: {e}")
+                    # a killed clone can leave a partial checkout behind
+                    shutil.rmtree(cfg.local_folder, ignore_errors=True)
+                    if i == retries - 1:
+                        raise
+                    backoff_sleep(i)
             logger.info("Repository cloned successfully")
-        safe_git_operation(["git", "checkout", "-B", "main"])
-        safe_git_operation(["git", "pull", "origin", "main"])
+        # the clone may be the active one (re-activation, shared local_folder):
+        # don't let checkout/pull race the commit worker in it
+        with git_lock(cfg=cfg):
+            safe_git_operation(["git", "checkout", "-B", "main"], cwd=cfg.local_folder)
+            safe_git_operation(["git", "pull", "origin", "main"], cwd=cfg.local_folder)
         logger.info("Repository is ready on main branch")
-    except OSError as e:
+        return True
+    except OSError as e:  # includes a git lock timeout
         logger.warning(f"OS error in ensure_repository (skipping clone/setup): {e}")
-    except subprocess.CalledProcessError as e:
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
         logger.warning(f"Git operation failed during ensure_repository: {e}")
+    return False
 
-# Initialize repository
-ensure_repository()
+# Initialize repository (GITBRIDGE_SKIP_INIT=1 skips the clone/pull, e.g. for tests)
+# and start the commit worker
+if os.getenv("GITBRIDGE_SKIP_INIT") != "1":
+    ensure_repository()
+threading.Thread(target=commit_worker, name="gitbridge-commit-worker", daemon=True).start()
 
 # ---------------------------------------------------------------------
 # 5. ERROR HANDLING DECORATOR
@@ -193,6 +520,8 @@ def handle_errors(f):
     def wrapper(*args, **kwargs):
         try:
             return f(*args, **kwargs)
+        except HTTPException as e:
+            return jsonify(error=e.description), e.code
         except subprocess.CalledProcessError as e:
             logger.error(f"Git error in {f.__name__}: {e.stderr}")
             return jsonify(error=f"Git operation failed: {e.stderr}"), 500
@@ -207,20 +536,112 @@ def handle_errors(f):
 # ---------------------------------------------------------------------
 # 6. FLASK APP & ROUTES
 # ---------------------------------------------------------------------
+# Request bodies are capped both as sent and, for gzip, once inflated
+MAX_BODY_BYTES = int(os.getenv("GITBRIDGE_MAX_BODY_BYTES", str(16 * 1024 * 1024)))
+
 app = Flask(__name__)
+app.config["MAX_CONTENT_LENGTH"] = MAX_BODY_BYTES
 logger.info("GitBridge backend starting...")
-logger.info(f"Repository: {REPO}")
-logger.info(f"Local folder: {LOCAL_FOLDER.resolve()}")
-logger.info(f"Safe mode: {SAFE_MODE}")
+logger.info(f"Repository: {CFG.repo}")
+logger.info(f"Local folder: {CFG.local_abs}")
+logger.info(f"Safe mode: {CFG.safe_mode}")
+
+
+def _json_response(obj, status: int = 200) -> Response:
+    """Serialize with orjson for the larger read-only payloads"""
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
+
+def _request_json():
+    """Decode the JSON request body, inflating it first if sent gzip-encoded"""
+    body = request.get_data(cache=False)
+    if request.content_encoding == 'gzip':
+        # inflate at most one byte past the cap, so a gzip bomb can't allocate more
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            inflated = inflater.decompress(body, MAX_BODY_BYTES + 1)
+        except zlib.error as e:
+            raise ValueError(f"Invalid gzip body: {e}")
+        if len(inflated) > MAX_BODY_BYTES:
+            raise RequestEntityTooLarge(f"Decompressed body exceeds {MAX_BODY_BYTES} bytes")
+        if not inflater.eof:
+            raise ValueError("Invalid gzip body: truncated stream")
+        body = inflated
+    return orjson.loads(body) if body else None
+
+
+# Short-lived (size, mtime) cache for polled paths; None records a missing file
+_stat_cache = TTLCache(maxsize=4096, ttl=1.0)
+_stat_lock = threading.Lock()
+_STAT_MISS = object()
+
+
+def _cached_stat(path: Path):
+    """Return (size, mtime) for path, or None if it does not exist"""
+    key = str(path)
+    with _stat_lock:
+        hit = _stat_cache.get(key, _STAT_MISS)
+    if hit is not _STAT_MISS:
+        return hit
+    try:
+        st = os.stat(key)
+        value = (st.st_size, st.st_mtime)
+    except FileNotFoundError:
+        value = None
+    with _stat_lock:
+        _stat_cache[key] = value
+    return value
+
+
+def _forget_stat(*paths: Path) -> None:
+    with _stat_lock:
+        for p in paths:
+            _stat_cache.pop(str(p), None)
+
+
+# Parent directories already created by write_file_safe
+_mkdir_cache: set[Path] = set()
+
+
+# mkstemp creates 0600 files; read the umask once (os.umask can only be read by
+# setting it) so new files get the mode a plain open() would have given them
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
 
 
 def write_file_safe(path: Path, content: str) -> None:
-    """Safely write file with atomic rename"""
+    """Safely write file with atomic replace (no fsync; the commit records it durably)"""
     try:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        tmp = path.with_suffix(path.suffix + '.tmp')
-        tmp.write_text(content, encoding='utf-8')
-        tmp.rename(path)
+        parent = path.parent
+        if parent not in _mkdir_cache:
+            parent.mkdir(parents=True, exist_ok=True)
+            _mkdir_cache.add(parent)
+        try:
+            fd, tmp = tempfile.mkstemp(dir=parent, prefix='.tmp_', suffix=path.suffix)
+        except FileNotFoundError:
+            # cached parent was moved away since; recreate it
+            parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=parent, prefix='.tmp_', suffix=path.suffix)
+        try:
+            try:
+                # an overwrite keeps the existing file's mode
+                try:
+                    mode = os.stat(path).st_mode & 0o7777
+                except FileNotFoundError:
+                    mode = 0o666 & ~_UMASK
+                os.fchmod(fd, mode)
+                view = memoryview(content.encode('utf-8'))
+                while view:
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd)
+            os.replace(tmp, path)
+            _forget_stat(path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.unlink(tmp)
+            raise
+        _invalidate_tree_cache()
         logger.info(f"File written successfully: {path}")
     except Exception as e:
         logger.error(f"Failed to write file {path}: {e}")
@@ -229,112 +650,184 @@ def write_file_safe(path: Path, content: str) -> None:
 @app.get("/")
 @handle_errors
 def index():
-    return jsonify(
+    return _json_response(dict(
         status="GitBridge is live",
         version="2.0-stable",
-        endpoints=["/upload","/move","/delete","/tree","/profiles","/health","/verify_upload"],
-        active_profile=profile.get("name","unknown")
-    )
+        endpoints=["/upload","/move","/delete","/tree","/profiles","/health","/verify_upload","/commit_status"],
+        active_profile=CFG.name
+    ))
 
 @app.post("/upload")
 @handle_errors
 def upload():
-    data = request.get_json(force=True)
+    data = _request_json()
     if not data or "path" not in data or "content" not in data:
         return jsonify(error="Missing required: path, content"), 400
-    file_path = validate_path(data["path"])
+    cfg = CFG
+    file_path = validate_path(data["path"], cfg)
     write_file_safe(file_path, data["content"])
-    commit_push_safe(f"Upload {data['path']}")
-    return jsonify(status="success", path=data["path"])  
+    job_id = enqueue_commit(f"Upload {data['path']}", cfg)
+    return jsonify(status="queued", path=data["path"], job_id=job_id), 202
 
 @app.post("/move")
 @handle_errors
 def move():
-    data = request.get_json(force=True)
+    data = _request_json()
     if not data or "src" not in data or "dst" not in data:
         return jsonify(error="Missing required: src, dst"), 400
-    src = validate_path(data["src"])
-    dst = validate_path(data["dst"])
+    cfg = CFG
+    src = validate_path(data["src"], cfg)
+    dst = validate_path(data["dst"], cfg)
     if not src.exists():
         return jsonify(error="Source not found"), 404
     dst.parent.mkdir(parents=True, exist_ok=True)
     shutil.move(str(src), str(dst))
-    commit_push_safe(f"Move {data['src']} to {data['dst']}")
-    return jsonify(status="success", from_=data["src"], to=data["dst"])  
+    _forget_stat(src, dst)
+    _invalidate_tree_cache()
+    job_id = enqueue_commit(f"Move {data['src']} to {data['dst']}", cfg)
+    return jsonify(status="queued", from_=data["src"], to=data["dst"], job_id=job_id), 202
 
 @app.post("/delete")
 @handle_errors
 def delete():
-    data = request.get_json(force=True)
+    data = _request_json()
     if not data or "path" not in data:
         return jsonify(error="Missing required: path"), 400
-    if SAFE_MODE:
+    cfg = CFG
+    if cfg.safe_mode:
         return jsonify(error="Deletion disabled (safe mode)"), 403
-    fp = validate_path(data["path"])
+    fp = validate_path(data["path"], cfg)
     if not fp.exists():
         return jsonify(error="File not found"), 404
     fp.unlink()
-    commit_push_safe(f"Delete {data['path']}")
-    return jsonify(status="success", path=data["path"])  
+    _forget_stat(fp)
+    _invalidate_tree_cache()
+    job_id = enqueue_commit(f"Delete {data['path']}", cfg)
+    return jsonify(status="queued", path=data["path"], job_id=job_id), 202
+
+@app.get("/commit_status")
+@handle_errors
+def commit_status():
+    job_id = request.args.get("job_id")
+    if not job_id:
+        return jsonify(error="Missing required: job_id"), 400
+    with _jobs_lock:
+        job = commit_jobs.get(job_id)
+        job = dict(job) if job else None
+    if job is None:
+        return jsonify(error="Unknown job id"), 404
+    return jsonify(job_id=job_id, pending=commit_queue.qsize(), **job)
+
+TREE_CHUNK_FILES = 512
+
+
+def _walk_repo(cfg: Cfg):
+    """Yield repo-relative file paths depth-first, sorted within each directory
+
+    Dot-directories like .git are never descended into."""
+    root = str(cfg.local_folder)
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        with os.scandir(d) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        subdirs = []
+        for e in entries:
+            if e.name.startswith('.'):
+                continue
+            # DirEntry type checks use the cached d_type and skip a stat() per entry
+            if e.is_dir(follow_symlinks=False):
+                subdirs.append(e.path)
+            elif e.is_file(follow_symlinks=False):
+                yield os.path.relpath(e.path, root)
+        stack.extend(reversed(subdirs))
+
+
+def _stream_tree(cfg: Cfg, key):
+    """Stream the /tree JSON as the walk proceeds and cache the finished body under key"""
+    global _tree_cache
+    parts = []
+    chunk = bytearray(b'{"files":[')
+    count = 0
+    for rel in _walk_repo(cfg):
+        if count:
+            chunk += b','
+        chunk += orjson.dumps(rel)
+        count += 1
+        if count % TREE_CHUNK_FILES == 0:
+            parts.append(bytes(chunk))
+            yield parts[-1]
+            chunk.clear()
+    chunk += b'],"count":%d}' % count
+    parts.append(bytes(chunk))
+    yield parts[-1]
+    _tree_cache = (key, b''.join(parts))
 
 @app.get("/tree")
 @handle_errors
 def tree():
-    files = []
-    for p in LOCAL_FOLDER.rglob("*"):
-        if p.is_file() and not p.name.startswith('.'):
-            files.append(str(p.relative_to(LOCAL_FOLDER)))
-    files.sort()
-    return jsonify(files=files, count=len(files))
+    cfg = CFG
+    key = (cfg.local_abs, _head_sha(cfg), cfg.local_folder.stat().st_mtime_ns, _tree_generation)
+    cached = _tree_cache
+    if cached is not None and cached[0] == key:
+        return Response(cached[1], mimetype='application/json')
+    return Response(_stream_tree(cfg, key), mimetype='application/json')
 
 @app.get("/profiles")
 @handle_errors
 def profiles():
-    profiles = []
-    for f in PROFILE_PATH.parent.glob("*.json"):
-        try:
-            j = json.loads(f.read_text())
-            if 'name' in j:
-                profiles.append(j['name'])
-        except:
-            continue
-    profiles.sort()
-    return jsonify(profiles=profiles)
+    return _json_response({"profiles": _scan_profiles()["names"]})
 
 @app.post("/profiles/activate")
 @handle_errors
 def activate_profile():
-    data = request.get_json(force=True)
+    global CFG
+    data = _request_json()
     if 'name' not in data:
         return jsonify(error="Missing required: name"), 400
-    target = None
-    for f in PROFILE_PATH.parent.glob("*.json"):
-        try:
-            j = json.loads(f.read_text())
-            if j.get('name') == data['name']:
-                target = f
-                break
-        except:
-            continue
+    target = _scan_profiles()["by_name"].get(data['name'])
     if not target:
         return jsonify(error="Profile not found"), 404
+    new_cfg = build_cfg(load_profile(target))
+    # prepare the new repo first: a failed clone must leave the current profile active.
+    # One clone attempt only, so the request stays bounded (see ACTIVATE_TIMEOUT in the GUI)
+    if not ensure_repository(new_cfg, retries=1) or not (new_cfg.local_folder / ".git").exists():
+        return jsonify(error=f"Could not prepare repository for profile {data['name']}"), 502
+    # changes already queued belong to the current repo; commit them before switching
+    if not wait_for_commits(COMMIT_DRAIN_TIMEOUT):
+        return jsonify(error="Pending commits did not finish in time, try again"), 503
     backup = PROFILE_PATH.with_suffix('.bak')
-    shutil.copy2(PROFILE_PATH, backup)
-    shutil.copy2(target, PROFILE_PATH)
-    return jsonify(status="success", name=data['name'], message="Restart required")
+    if PROFILE_PATH.exists():
+        shutil.copy2(PROFILE_PATH, backup)
+    if target != PROFILE_PATH:
+        shutil.copy2(target, PROFILE_PATH)
+    with git_lock():
+        CFG = new_cfg
+    # writes that read the old CFG just before the swap were queued with it and
+    # still go to the old repo; wait for them so the switch is complete on return
+    if not wait_for_commits(COMMIT_DRAIN_TIMEOUT):
+        logger.warning("Commits queued under the previous profile are still pending")
+    _validate_path_cached.cache_clear()
+    _invalidate_tree_cache()
+    _mkdir_cache.clear()
+    with _stat_lock:
+        _stat_cache.clear()
+    logger.info(f"Activated profile {new_cfg.name} ({new_cfg.repo})")
+    return jsonify(status="success", name=data['name'], message="Profile activated")
 
 @app.get("/health")
 @handle_errors
 def health():
-    info = {"status": "ok", "repo": str(LOCAL_FOLDER), "safe_mode": SAFE_MODE}
-    if not LOCAL_FOLDER.exists():
+    cfg = CFG
+    info = {"status": "ok", "repo": str(cfg.local_folder), "safe_mode": cfg.safe_mode}
+    if not cfg.local_folder.exists():
         info['status'] = 'error'
         info['message'] = 'Repo not found'
         return jsonify(info), 500
     try:
-        st = safe_git_operation(["git", "status", "--porcelain"]).stdout
+        st = safe_git_operation(["git", "status", "--porcelain"], cwd=cfg.local_folder).stdout
         info['git_status'] = 'clean' if not st.strip() else 'dirty'
-        safe_git_operation(["git", "ls-remote", "origin"], timeout=10)
+        safe_git_operation(["git", "ls-remote", "origin"], cwd=cfg.local_folder, timeout=10)
         info['remote'] = 'connected'
     except subprocess.CalledProcessError as e:
         info['status'] = 'warning'
@@ -349,17 +842,27 @@ def health():
 @app.post("/verify_upload")
 @handle_errors
 def verify_upload():
-    data = request.get_json(force=True)
+    data = _request_json()
     if 'path' not in data:
         return jsonify(error="Missing required: path"), 400
-    p = validate_path(data['path'])
-    exists = p.exists()
-    res = {'exists': exists, 'path': str(p.relative_to(LOCAL_FOLDER))}
-    if exists:
-        st = p.stat()
-        res.update(size=st.st_size, modified=st.st_mtime)
+    cfg = CFG
+    p = validate_path(data['path'], cfg)
+    st = _cached_stat(p)
+    res = {'exists': st is not None, 'path': os.path.relpath(p, cfg.local_abs)}
+    if st is not None:
+        res.update(size=st[0], modified=st[1])
     return jsonify(res)
 
+def run_server(port: int = None) -> None:
+    """Serve with waitress' thread pool so reads proceed while a commit holds the Git lock"""
+    port = port or int(os.getenv('PORT', 8080))
+    try:
+        from waitress import serve
+    except ImportError:
+        logger.warning("waitress not installed, falling back to the threaded Flask dev server")
+        app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
+        return
+    serve(app, host='0.0.0.0', port=port, threads=int(os.getenv("GITBRIDGE_THREADS", "8")))
+
 if __name__ == '__main__':
-    port = int(os.getenv('PORT', 8080))
-    app.run(host='0.0.0.0', port=port, debug=False)
+    run_server()
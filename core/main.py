@@ -1,4 +1,4 @@
-from gitbridge import app
+from gitbridge import run_server
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8080)
+    run_server()
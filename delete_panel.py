@@ -1,20 +1,23 @@
+import orjson
 import streamlit as st
-import requests
+from http_client import get_client
 
 
+@st.fragment
 def render_delete_panel(api_url: str, log_message, safe_mode: bool) -> None:
     """
     Delete-file panel shown in the GUI sidebar.
     """
     st.header("Delete a File")
+    # defaults live in session_state, so the widget keeps its state by key
+    st.session_state.setdefault("delete_path", "archive/example.txt")
 
     with st.form("delete_form"):
         delete_path = st.text_input(
             "Path to Delete",
-            value="archive/example.txt",
             key="delete_path",
         )
-        delete_submit = st.form_submit_button("Delete")
+        delete_submit = st.form_submit_button("Delete", key="delete_submit")
 
         if safe_mode:
             st.warning("Safe mode is ON. Deletion is disabled.")
@@ -22,8 +25,8 @@ def render_delete_panel(api_url: str, log_message, safe_mode: bool) -> None:
 
         if delete_submit:
             try:
-                res = requests.post(f"{api_url}/delete", json={"path": delete_path})
-                st.success(res.json())
+                res = get_client(api_url).post("/delete", json={"path": delete_path})
+                st.success(orjson.loads(res.content))
                 log_message(f"Deleted {delete_path}")
             except Exception as e:
                 st.error(f"Delete failed: {e}")
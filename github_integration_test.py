@@ -7,6 +7,8 @@ ENV:
   GH_REPO    – owner/repo  (e.g. gray247/GitBridge-test)
 """
 import os, time, uuid, requests, sys
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 API      = "http://localhost:8080"
 HEADERS  = {"Accept": "application/vnd.github+json",
@@ -15,13 +17,29 @@ HEADERS  = {"Accept": "application/vnd.github+json",
 OWNER, REPO = os.environ["GH_REPO"].split("/", 1)
 GH_COMMITS  = f"https://api.github.com/repos/{OWNER}/{REPO}/commits"
 
+# one keep-alive session for the whole run; urllib3 retries transient 5xx
+S = requests.Session()
+for scheme in ("http://", "https://"):
+    S.mount(scheme, HTTPAdapter(pool_connections=4, pool_maxsize=4,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504))))
+
 def must(ok, msg):
     print(f"   {'✅' if ok else '❌'} {msg}")
     if not ok: sys.exit(1)
 
 def call(route, payload):
-    r = requests.post(f"{API}{route}", json=payload, timeout=10)
-    must(r.status_code == 200, f"{route} failed → {r.text}")
+    r = S.post(f"{API}{route}", json=payload, timeout=10)
+    must(r.status_code == 202, f"{route} failed → {r.text}")
+    return r.json()["job_id"]
+
+def wait_for_commit(job_id, deadline=30):
+    end = time.time() + deadline
+    while time.time() < end:
+        job = S.get(f"{API}/commit_status", params={"job_id": job_id}, timeout=10).json()
+        if job["status"] in ("done", "no_changes", "failed"):
+            return job
+        time.sleep(0.5)
+    return job
 
 uid   = uuid.uuid4().hex[:8]
 paths = {
@@ -29,25 +47,30 @@ paths = {
     "moved" : f"itest_moved/{uid}.txt",
 }
 
+def call_and_commit(route, payload):
+    # wait for each push, otherwise the three changes are coalesced into one
+    # batch that cancels out and nothing is committed
+    job_id = call(route, payload)
+    job = wait_for_commit(job_id)
+    must(job["status"] == "done", f"commit job {job_id} → {job}")
+
 print("1) /upload …")
-call("/upload", {"path": paths["upload"], "content": "hello"})
+call_and_commit("/upload", {"path": paths["upload"], "content": "hello"})
 print("2) /move …")
-call("/move", {"src": paths["upload"], "dst": paths["moved"]})
+call_and_commit("/move", {"src": paths["upload"], "dst": paths["moved"]})
 print("3) /delete …")
-call("/delete", {"path": paths["moved"]})
-
-print("4) waiting for Git push …")
-time.sleep(4)                    # short wait; gitbridge already pushed
+call_and_commit("/delete", {"path": paths["moved"]})
 
 need = {f"Upload {paths['upload']}",
         f"Move {paths['upload']} to {paths['moved']}",
         f"Delete {paths['moved']}"}
 
-print("5) verify commits on GitHub …")
-resp = requests.get(GH_COMMITS, headers=HEADERS, params={"per_page": 10})
+print("4) verify commits on GitHub …")
+resp = S.get(GH_COMMITS, headers=HEADERS, params={"per_page": 10}, timeout=10)
 resp.raise_for_status()
 
-messages = {c["commit"]["message"] for c in resp.json()}
+# a coalesced commit joins its messages with "; "
+messages = {m for c in resp.json() for m in c["commit"]["message"].split("; ")}
 missing  = need - messages
 must(not missing, f"Missing commit messages: {sorted(missing)}")
 print("🎉  All expected commits present on GitHub")
\ No newline at end of file
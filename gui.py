@@ -1,33 +1,54 @@
+import collections
+
 import streamlit as st
 from upload_panel import render_upload_panel
 from move_panel import render_move_panel
 from delete_panel import render_delete_panel
 from profile_panel import render_profile_panel
 from gui_tree import render_tree_panel
+from http_client import initial_state
 
 API_URL = "https://gitbridge-test-1.onrender.com"
 
+LOG_MAX_ENTRIES = 200
+
 def log_message(msg):
-    if "log" not in st.session_state:
-        st.session_state["log"] = []
+    init_log()
     st.session_state["log"].append(msg)
 
 def init_log():
-    if "log" not in st.session_state:
-        st.session_state["log"] = []
+    # bounded, so a long session doesn't grow the log without limit
+    st.session_state.setdefault("log", collections.deque(maxlen=LOG_MAX_ENTRIES))
 
 def display_log():
     st.sidebar.subheader("Log")
-    for entry in st.session_state.get("log", []):
-        st.sidebar.write(entry)
+    # one widget for the whole log instead of one per entry
+    st.sidebar.code("\n".join(st.session_state.get("log", ())))
 
 st.set_page_config(page_title="GitBridge", layout="wide")
 st.title("GitBridge Control Panel")
 
+# Profiles, active profile and tree in one concurrent round trip; on failure
+# each panel falls back to fetching for itself
+try:
+    state = initial_state(API_URL)
+except Exception:
+    state = None
+
+# Only the selected panel builds its widgets on a rerun. Each panel is an
+# st.fragment, so its own submits rerun just that panel, not the profile
+# sidebar; the log below catches up on the next full rerun.
+PANELS = {
+    "Upload": lambda: render_upload_panel(API_URL, log_message),
+    "Move": lambda: render_move_panel(API_URL, log_message),
+    "Delete": lambda: render_delete_panel(API_URL, log_message, safe_mode=st.session_state.get("safe_mode", False)),
+    "Tree": lambda: render_tree_panel(API_URL, log_message, files=state and state["files"]),
+}
+
 init_log()
-render_profile_panel(API_URL, log_message)
-render_upload_panel(API_URL, log_message)
-render_move_panel(API_URL, log_message)
-render_delete_panel(API_URL, log_message, safe_mode=st.session_state.get("safe_mode", False))
-render_tree_panel(API_URL, log_message)
-display_log()
+render_profile_panel(API_URL, log_message, state=state)
+panel = st.sidebar.radio("Panel", list(PANELS), key="panel")
+PANELS[panel]()
+# entries are still recorded while hidden; they're only rendered on demand
+if st.sidebar.checkbox("Show log", key="show_log", value=False):
+    display_log()
@@ -1,14 +1,38 @@
+import orjson
 import streamlit as st
-import requests
+from http_client import get_client
 
-def render_tree_panel(api_url, log_message):
+
+@st.cache_data(ttl=120, show_spinner=False)
+def _fetch_tree(api_url, nonce):
+    # nonce is only part of the cache key: bumping it forces a refetch. Errors
+    # raise rather than return [], so a failed fetch is shown and never cached
+    res = get_client(api_url).get("/tree")
+    res.raise_for_status()
+    return orjson.loads(res.content).get("files", [])
+
+
+@st.fragment
+def render_tree_panel(api_url, log_message, files=None):
+    """`files` is the pre-fetched listing shown until the first refresh."""
     st.header("View File Tree")
-    if st.button("Refresh Tree"):
-        try:
-            res = requests.get(f"{api_url}/tree")
-            files = res.json().get("files", [])
-            st.code("\n".join(files))
+    st.session_state.setdefault("tree_nonce", 0)
+    refresh = st.button("Refresh Tree", key="tree_refresh")
+    if refresh:
+        st.session_state.tree_nonce += 1
+    if not st.session_state.tree_nonce and files is None:
+        return
+    try:
+        if st.session_state.tree_nonce:
+            files = _fetch_tree(api_url, st.session_state.tree_nonce)
+        # rebuild the joined listing only when the file list actually changed
+        tree_hash = hash(tuple(files))
+        if st.session_state.get("tree_hash") != tree_hash:
+            st.session_state["tree_rendered"] = "\n".join(files)
+            st.session_state["tree_hash"] = tree_hash
+        st.code(st.session_state.get("tree_rendered", ""))
+        if refresh:
             log_message("Refreshed file tree")
-        except Exception as e:
-            st.error(f"Tree fetch failed: {e}")
-            log_message("Tree fetch failed")
\ No newline at end of file
+    except Exception as e:
+        st.error(f"Tree fetch failed: {e}")
+        log_message("Tree fetch failed")
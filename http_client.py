@@ -0,0 +1,48 @@
+import asyncio
+
+import httpx
+import orjson
+import streamlit as st
+
+# 10 s per operation, 3.05 s to connect, for every backend call
+TIMEOUT = httpx.Timeout(10.0, connect=3.05)
+LIMITS = httpx.Limits(max_connections=8, max_keepalive_connections=8)
+
+
+@st.cache_resource
+def get_client(api_url: str) -> httpx.Client:
+    """
+    One client per backend, shared by all panels and reruns. Over HTTPS it
+    negotiates HTTP/2, so concurrent calls multiplex over a single TCP+TLS
+    connection. Failed connection attempts are retried by the transport.
+    """
+    transport = httpx.HTTPTransport(http2=True, limits=LIMITS, retries=3)
+    return httpx.Client(base_url=api_url, timeout=TIMEOUT, transport=transport)
+
+
+async def _gather_initial_state(api_url: str) -> dict:
+    async with httpx.AsyncClient(base_url=api_url, http2=True, timeout=TIMEOUT) as client:
+        async def get_json(path):
+            res = await client.get(path)
+            res.raise_for_status()
+            return orjson.loads(res.content)
+
+        profiles, index, tree = await asyncio.gather(
+            get_json("/profiles"), get_json("/"), get_json("/tree")
+        )
+    return {
+        "profiles": profiles.get("profiles", []),
+        "active_profile": index.get("active_profile", ""),
+        "files": tree.get("files", []),
+    }
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def initial_state(api_url: str) -> dict:
+    """
+    Fetch /profiles, / and /tree concurrently in one event loop, so the first
+    render costs a single round trip. Panels take the result as pre-fetched
+    data instead of issuing their own GETs. Raises on failure (and is then
+    not cached); callers fall back to the panels' own fetches.
+    """
+    return asyncio.run(_gather_initial_state(api_url))
@@ -1,19 +1,24 @@
+import orjson
 import streamlit as st
-import requests
+from http_client import get_client
 
+@st.fragment
 def render_move_panel(api_url, log_message):
     st.header("Move a File")
+    # defaults live in session_state, so the widgets keep their state by key
+    st.session_state.setdefault("move_src", "demo/example.txt")
+    st.session_state.setdefault("move_dst", "archive/example.txt")
     with st.form("move_form"):
-        src = st.text_input("Source Path", value="demo/example.txt", key="move_src")
-        dst = st.text_input("Destination Path", value="archive/example.txt", key="move_dst")
-        move_submit = st.form_submit_button("Move")
+        src = st.text_input("Source Path", key="move_src")
+        dst = st.text_input("Destination Path", key="move_dst")
+        move_submit = st.form_submit_button("Move", key="move_submit")
         if move_submit:
             try:
-                res = requests.post(f"{api_url}/move", json={
+                res = get_client(api_url).post("/move", json={
                     "src": src,
                     "dst": dst
                 })
-                st.success(res.json())
+                st.success(orjson.loads(res.content))
                 log_message(f"Moved: {src} to {dst}")
             except Exception as e:
                 st.error(f"Move failed: {e}")
@@ -1,33 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import orjson
 import streamlit as st
-import requests
+from gui_tree import _fetch_tree
+from http_client import get_client, initial_state
+
+# Activation clones the new repo (one 60 s attempt), updates it and waits up to
+# 30 s twice for queued commits, each step possibly behind the 30 s git lock
+ACTIVATE_TIMEOUT = httpx.Timeout(300.0, connect=3.05)
+
+
+# Cached so ordinary reruns skip the round-trips. Errors propagate instead of
+# returning a fallback: st.cache_data never stores a raised exception, so a
+# failed fetch is retried on the next rerun rather than cached for the TTL.
+@st.cache_data(ttl=30, show_spinner=False)
+def _fetch_profile_state(api_url: str) -> tuple:
+    """Return (profiles, active_profile), fetching /profiles and / concurrently."""
+    client = get_client(api_url)
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        f_profiles = ex.submit(client.get, "/profiles")
+        f_idx = ex.submit(client.get, "/")
+        prof_resp, idx_resp = f_profiles.result(), f_idx.result()
+    prof_resp.raise_for_status()
+    idx_resp.raise_for_status()
+    profiles = orjson.loads(prof_resp.content).get("profiles", [])
+    return profiles, orjson.loads(idx_resp.content).get("active_profile", "")
+
 
-def render_profile_panel(api_url: str, log_message):
-    st.sidebar.markdown("### Profile")
+def _activate_profile(api_url: str, log_message):
+    """
+    Radio on_change callback: runs before the rerun that the change triggers,
+    so the sidebar is redrawn with the new active profile without a second
+    rerun. On failure the radio goes back to the previous profile.
+    """
+    prof = st.session_state.profile_radio
     try:
-        prof_resp = requests.get(f"{api_url}/profiles", timeout=5)
-        prof_resp.raise_for_status()
-        profiles = prof_resp.json().get("profiles", [])
+        get_client(api_url).post("/profiles/activate", json={"name": prof},
+                                 timeout=ACTIVATE_TIMEOUT).raise_for_status()
     except Exception as exc:
-        st.sidebar.error(f"Could not fetch profile list: {exc}")
+        st.session_state.profile_error = f"Activation failed: {exc}"
+        # dropping the widget state re-creates the radio on the active profile
+        del st.session_state.profile_radio
         return
+    st.session_state.active_profile = prof
+    _fetch_profile_state.clear()
+    initial_state.clear()
+    # a refreshed listing is cached too and would still show the old repo
+    _fetch_tree.clear()
+    log_message(f"Switched to profile: {prof}")
 
-    if "active_profile" not in st.session_state:
-        # call `/` once to know the active profile
+
+def render_profile_panel(api_url: str, log_message, state: dict = None):
+    if state is not None:
+        profiles, active_profile = state["profiles"], state["active_profile"]
+    else:
         try:
-            idx = requests.get(api_url, timeout=5).json()
-            st.session_state.active_profile = idx.get("active_profile", "")
-        except Exception:
-            st.session_state.active_profile = ""
+            profiles, active_profile = _fetch_profile_state(api_url)
+        except Exception as exc:
+            st.sidebar.error(f"Could not fetch profile list: {exc}")
+            return
+
+    if "active_profile" not in st.session_state:
+        st.session_state.active_profile = active_profile
 
     active = st.session_state.get("active_profile", "")
 
-    for prof in profiles:
-        label = f"**{prof}**" if prof == active else prof
-        if st.sidebar.button(label, key=f"profile_{prof}"):
-            try:
-                requests.post(f"{api_url}/profiles/activate",
-                              json={"name": prof}, timeout=5).raise_for_status()
-                log_message(f"Switched to profile: {prof}")
-                st.experimental_rerun()
-            except Exception as exc:
-                st.sidebar.error(f"Activation failed: {exc}")
\ No newline at end of file
+    # one widget however many profiles there are
+    st.sidebar.radio("Profile", profiles,
+                     index=profiles.index(active) if active in profiles else None,
+                     key="profile_radio", on_change=_activate_profile,
+                     args=(api_url, log_message))
+
+    error = st.session_state.pop("profile_error", None)
+    if error:
+        st.sidebar.error(error)
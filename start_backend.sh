@@ -3,4 +3,4 @@
 fuser -k 8080/tcp > /dev/null 2>&1
 
 # Start the GitBridge backend
-python3 gitbridge.py
\ No newline at end of file
+python3 core/main.py
\ No newline at end of file
@@ -2,4 +2,4 @@
 chmod 600 ~/.ssh/gitbridge_key
 chmod 644 ~/.ssh/gitbridge_key.pub
 chmod 600 ~/.ssh/config
-python3 gitbridge.py
+python3 core/main.py
@@ -1,32 +1,44 @@
+import os
 import unittest
+
 import requests
 
-BASE_URL = "https://gitbridge.gray247.repl.co"
+BASE_URL = os.environ.get("GITBRIDGE_BASE_URL", "https://gitbridge.gray247.repl.co")
 
 class TestGitBridgeAPI(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        # one keep-alive connection for the whole class
+        cls.session = requests.Session()
+        cls.session.headers.update({"Content-Type": "application/json"})
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.session.close()
+
     def test_root_endpoint(self):
-        response = requests.get(BASE_URL + "/")
+        response = self.session.get(BASE_URL + "/")
         self.assertEqual(response.status_code, 200)
         data = response.json()
         self.assertIn("status", data)
         self.assertIn("/upload", data["endpoints"])
 
     def test_tree_endpoint(self):
-        response = requests.get(BASE_URL + "/tree")
+        response = self.session.get(BASE_URL + "/tree")
         self.assertEqual(response.status_code, 200)
 
     def test_upload_missing_data(self):
-        response = requests.post(BASE_URL + "/upload", json={})
+        response = self.session.post(BASE_URL + "/upload", json={})
         self.assertEqual(response.status_code, 400)
 
     def test_move_missing_data(self):
-        response = requests.post(BASE_URL + "/move", json={})
+        response = self.session.post(BASE_URL + "/move", json={})
         self.assertEqual(response.status_code, 400)
 
     @unittest.skip("Download endpoint not implemented yet")
     def test_download_missing_path(self):
-        response = requests.get(BASE_URL + "/download")
+        response = self.session.get(BASE_URL + "/download")
         self.assertEqual(response.status_code, 400)
 
 if __name__ == "__main__":
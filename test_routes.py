@@ -1,55 +1,104 @@
+import os
 import unittest
+
 import requests
 
-BASE_URL = "http://localhost:8080"
+BASE_URL = os.environ.get("GITBRIDGE_BASE_URL", "http://localhost:8080")
 
 class TestGitBridgeRoutes(unittest.TestCase):
 
-    def setUp(self):
-        # Upload fresh file before each test
-        requests.post(BASE_URL + "/upload", json={
-            "path": "demo/test_route.txt",
+    @classmethod
+    def setUpClass(cls):
+        # one keep-alive connection for the whole class
+        cls.session = requests.Session()
+        cls.session.headers.update({"Content-Type": "application/json"})
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.session.close()
+
+    def upload_fixture(self):
+        # Only the move and delete tests need a file to act on. Its path is
+        # unique per test method so concurrent tests don't touch each
+        # other's files; /upload replaces the file if a rerun left it behind.
+        src = f"demo/{self._testMethodName}.txt"
+        self.session.post(BASE_URL + "/upload", json={
+            "path": src,
             "content": "Test file for move and delete"
         })
+        return src, f"archive/{self._testMethodName}.txt"
 
     def test_upload_route(self):
         data = {
             "path": "demo/test_upload.txt",
             "content": "This is a test file"
         }
-        response = requests.post(BASE_URL + "/upload", json=data)
-        self.assertEqual(response.status_code, 200)
-        self.assertIn("Uploaded", response.text)
+        response = self.session.post(BASE_URL + "/upload", json=data)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status"], "queued")
+        self.assertIn("job_id", response.json())
 
     def test_tree_route(self):
-        response = requests.get(BASE_URL + "/tree")
+        response = self.session.get(BASE_URL + "/tree")
         self.assertEqual(response.status_code, 200)
         self.assertIn("files", response.json())
 
     def test_move_route(self):
+        src, dst = self.upload_fixture()
         data = {
-            "src": "demo/test_route.txt",
-            "dst": "archive/test_route.txt"
+            "src": src,
+            "dst": dst
         }
-        response = requests.post(BASE_URL + "/move", json=data)
-        self.assertEqual(response.status_code, 200)
-        self.assertIn("Moved", response.text)
+        response = self.session.post(BASE_URL + "/move", json=data)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status"], "queued")
+        self.assertIn("job_id", response.json())
 
     def test_delete_route(self):
+        src, dst = self.upload_fixture()
         # Ensure file is moved before deleting
-        requests.post(BASE_URL + "/move", json={
-            "src": "demo/test_route.txt",
-            "dst": "archive/test_route.txt"
+        self.session.post(BASE_URL + "/move", json={
+            "src": src,
+            "dst": dst
         })
-        response = requests.post(BASE_URL + "/delete", json={
-            "path": "archive/test_route.txt"
+        response = self.session.post(BASE_URL + "/delete", json={
+            "path": dst
         })
-        self.assertEqual(response.status_code, 200)
-        self.assertIn("Deleted", response.text)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status"], "queued")
+        self.assertIn("job_id", response.json())
 
     def test_missing_upload_data(self):
-        response = requests.post(BASE_URL + "/upload", json={})
+        response = self.session.post(BASE_URL + "/upload", json={})
         self.assertEqual(response.status_code, 400)
 
+    def test_commit_status_route(self):
+        response = self.session.post(BASE_URL + "/upload", json={
+            "path": "demo/test_commit_status.txt",
+            "content": "Test file for commit status"
+        })
+        job_id = response.json()["job_id"]
+        response = self.session.get(BASE_URL + "/commit_status", params={"job_id": job_id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["job_id"], job_id)
+        self.assertIn(response.json()["status"], ("queued", "running", "done", "no_changes", "failed"))
+
+    def test_commit_status_missing_job_id(self):
+        response = self.session.get(BASE_URL + "/commit_status")
+        self.assertEqual(response.status_code, 400)
+
+    def test_commit_status_unknown_job_id(self):
+        response = self.session.get(BASE_URL + "/commit_status", params={"job_id": "does-not-exist"})
+        self.assertEqual(response.status_code, 404)
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    # The tests are independent HTTP calls, so run them in parallel when
+    # concurrencytest is installed; otherwise fall back to the plain runner
+    try:
+        from concurrencytest import ConcurrentTestSuite, fork_for_tests
+    except ImportError:
+        unittest.main()
+    else:
+        suite = unittest.TestLoader().loadTestsFromTestCase(TestGitBridgeRoutes)
+        result = unittest.TextTestRunner().run(ConcurrentTestSuite(suite, fork_for_tests(4)))
+        raise SystemExit(not result.wasSuccessful())
\ No newline at end of file
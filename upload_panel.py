@@ -1,19 +1,35 @@
+import gzip
+
+import httpx
+import orjson
 import streamlit as st
-import requests
+from http_client import get_client
+
+# Bodies above this many bytes are gzip-compressed before sending
+GZIP_MIN_BYTES = 4096
+# Large pastes get longer than the default 10 s to upload
+UPLOAD_TIMEOUT = httpx.Timeout(30.0, connect=3.05)
 
+@st.fragment
 def render_upload_panel(api_url, log_message):
     st.header("Upload a File")
+    # defaults live in session_state, so the widgets keep their state by key
+    st.session_state.setdefault("upload_path", "demo/example.txt")
+    st.session_state.setdefault("upload_content", "This is a test file.")
     with st.form("upload_form"):
-        upload_path = st.text_input("File Path", value="demo/example.txt", key="upload_path")
-        upload_content = st.text_area("Content", value="This is a test file.", key="upload_content")
-        upload_submit = st.form_submit_button("Upload")
+        upload_path = st.text_input("File Path", key="upload_path")
+        upload_content = st.text_area("Content", key="upload_content")
+        upload_submit = st.form_submit_button("Upload", key="upload_submit")
         if upload_submit:
             try:
-                res = requests.post(f"{api_url}/upload", json={
-                    "path": upload_path,
-                    "content": upload_content
-                })
-                st.success(res.json())
+                body = orjson.dumps({"path": upload_path, "content": upload_content})
+                headers = {"Content-Type": "application/json"}
+                if len(body) > GZIP_MIN_BYTES:
+                    body = gzip.compress(body)
+                    headers["Content-Encoding"] = "gzip"
+                res = get_client(api_url).post("/upload", content=body,
+                                               headers=headers, timeout=UPLOAD_TIMEOUT)
+                st.success(orjson.loads(res.content))
                 log_message(f"Uploaded: {upload_path}")
             except Exception as e:
                 st.error(f"Upload failed: {e}")